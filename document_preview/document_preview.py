@@ -2,8 +2,12 @@ import os
 import pandas
 import subprocess
 import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain
+from queue import Full, Queue
+from threading import Event, Thread
 from time import time
-from typing import List
+from typing import List, Optional, Tuple
 
 from assemblyline_v4_service.common.base import ServiceBase
 from assemblyline_v4_service.common.request import ServiceRequest as Request
@@ -25,34 +29,78 @@ from selenium.webdriver import Chrome, ChromeOptions, ChromeService
 from selenium.webdriver.common.print_page_options import PrintOptions
 from selenium.common.exceptions import NoAlertPresentException, WebDriverException
 
-from natsort import natsorted
+import pypdfium2 as pdfium
+import pytesseract
+from PIL import Image
 
-from document_preview.helper.emlrender import processEml as eml2image
+from document_preview.helper.emlrender import processEml as eml2image, renderConfig as eml_render_config
 from documentbuilder.docbuilder import CDocBuilder
 
 PDFTOPPM_DPI = os.environ.get("PDFTOPPM_DPI", "150")
 
-
-def pdfinfo_from_path(fp: str):
-    pdfinfo = {}
-    for info in subprocess.run(["pdfinfo", fp], capture_output=True).stdout.strip().decode().split("\n"):
-        k, v = info.split(":", 1)
-        # Clean up spacing
-        v = v.lstrip()
-        pdfinfo[k] = v
-    return pdfinfo
-
-
-def convert_from_path(fp: str, output_directory: str, first_page=1, last_page=None):
-    pdf_conv_command = ["pdftoppm", "-r", PDFTOPPM_DPI, "-png", "-f", str(first_page)]
-    if last_page:
-        pdf_conv_command += ["-l", str(last_page)]
-    subprocess.run(pdf_conv_command + [fp, os.path.join(output_directory, "output")], capture_output=True)
+# Maps accepted file types onto their render handler up front, replacing the
+# per-request chains of startswith/any/endswith checks; types missing from the
+# table aren't renderable
+RENDER_HANDLERS = {
+    "document/odt/text": "office",
+    "document/odt/spreadsheet": "office",
+    "document/odt/presentation": "office",
+    "document/office/word": "office",
+    "document/office/excel": "office",
+    "document/office/powerpoint": "office",
+    "document/office/rtf": "office",
+    "text/csv": "csv",
+    "document/pdf": "pdf",
+    "document/epub": "ebook",
+    "document/mobi": "ebook",
+    "document/email": "email",
+    "document/office/email": "email",
+    "code/html": "html",
+}
+
+
+def _render_page_batch(fp: str, first_page: int, last_page: int, output_directory: str, scale: float) -> List[str]:
+    # Runs in a worker process, so open a private handle — PDFium objects can't cross processes
+    pdf = pdfium.PdfDocument(fp)
+    try:
+        output_paths = []
+        for i in range(first_page, last_page):
+            output_path = os.path.join(output_directory, f"output_{i:03}.jpeg")
+            pdf[i].render(scale=scale).to_pil().save(output_path, "JPEG", quality=85)
+            output_paths.append(output_path)
+        return output_paths
+    finally:
+        pdf.close()
 
 
 class DocumentPreview(ServiceBase):
     def __init__(self, config=None):
         super(DocumentPreview, self).__init__(config)
+        self.browser = None
+
+        # Page count of the PDF rendered for the current request, reused by the
+        # phishing heuristic instead of re-parsing the document
+        self._pdf_page_count = None
+
+        # Kill external conversion tools that run away on a broken or malicious
+        # document instead of letting them pin the worker until the service timeout
+        self.conversion_timeout = self.config.get("conversion_timeout", 30)
+
+        # Keep a single DocBuilder instance alive for the lifetime of the service
+        # instead of paying the bootstrap cost on every office conversion
+        self.docbuilder = CDocBuilder()
+
+    def start(self):
+        self._launch_browser()
+
+        # Resolve the EML renderer's imgkit configuration once rather than on every mail
+        self._eml_render_config = eml_render_config(load_ext_images=False)
+
+        self.log.debug("Document preview service started")
+
+    def _launch_browser(self):
+        # Launch a single long-lived browser that every HTML render reuses,
+        # rather than paying Chrome start-up cost per request
         browser_options = ChromeOptions()
 
         # Set brower options depending on service configuration
@@ -68,33 +116,47 @@ class DocumentPreview(ServiceBase):
         self.browser.set_network_conditions(offline=True, latency=5, throughput=500 * 1024)
         self.browser.set_window_size(1080, 1920)
 
-    def start(self):
-        self.log.debug("Document preview service started")
-
     def stop(self):
+        if self.browser:
+            try:
+                self.browser.quit()
+            except WebDriverException:
+                # Browser already gone, nothing to clean up
+                pass
+            self.browser = None
         self.log.debug("Document preview service ended")
 
     def extract_pdf_text(self, path: str, max_pages: int) -> str:
         output_path = os.path.join(self.working_directory, "extracted_text")
-        subprocess.run(
-            ["pdftotext", "-f", "1", "-l", str(max_pages), path, output_path],
-            capture_output=True,
-        )
+        try:
+            subprocess.run(
+                ["pdftotext", "-f", "1", "-l", str(max_pages), path, output_path],
+                capture_output=True,
+                timeout=self.conversion_timeout,
+            )
+        except subprocess.TimeoutExpired:
+            # A broken/malicious document shouldn't pin the worker; fall back to OCR
+            self.log.warning(f"pdftotext timed out after {self.conversion_timeout}s")
+            return None
 
         if os.path.exists(output_path):
             return output_path
 
     def extract_pdf_images(self, path: str, max_pages: int) -> List[str]:
         output_path_prefix = os.path.join(self.working_directory, "extracted_image")
-        subprocess.run(
-            ["pdfimages", "-f", "1", "-l", str(max_pages), "-png", path, output_path_prefix],
-            capture_output=True,
-        )
+        try:
+            subprocess.run(
+                ["pdfimages", "-f", "1", "-l", str(max_pages), "-png", path, output_path_prefix],
+                capture_output=True,
+                timeout=self.conversion_timeout,
+            )
+        except subprocess.TimeoutExpired:
+            # Keep whatever images were extracted before the timeout
+            self.log.warning(f"pdfimages timed out after {self.conversion_timeout}s")
 
+        # Single scandir pass; the entries already carry their full path
         return [
-            os.path.join(self.working_directory, f)
-            for f in os.listdir(self.working_directory)
-            if f.startswith("extracted_image")
+            entry.path for entry in os.scandir(self.working_directory) if entry.name.startswith("extracted_image")
         ]
 
     def ebook_conversion(self, request: Request):
@@ -104,27 +166,51 @@ class DocumentPreview(ServiceBase):
             tmp.flush()
 
             output_path = os.path.join(self.working_directory, "converted.pdf")
-            subprocess.run(
-                ["ebook-convert", tmp.name, output_path],
-                capture_output=True,
-            )
+            try:
+                subprocess.run(
+                    ["ebook-convert", tmp.name, output_path],
+                    capture_output=True,
+                    timeout=self.conversion_timeout,
+                )
+            except subprocess.TimeoutExpired:
+                # Conversion was killed mid-write, so don't trust any partial output
+                self.log.warning(f"ebook-convert timed out after {self.conversion_timeout}s")
+                return None
 
             if os.path.exists(output_path):
                 return output_path
 
     def office_conversion(self, file):
         output_path = os.path.join(self.working_directory, "converted.pdf")
-        builder = CDocBuilder()
-        builder.OpenFile(file, "")
-        builder.SaveFile("pdf", output_path)
-        builder.CloseFile()
+        try:
+            self.docbuilder.OpenFile(file, "")
+            self.docbuilder.SaveFile("pdf", output_path)
+        finally:
+            # Always close the document so the shared builder is clean for the next request
+            self.docbuilder.CloseFile()
         if os.path.exists(output_path):
             return output_path
 
-    def html_render(self, file_contents, max_pages=1) -> str:
+    def html_render(self, file_contents, max_pages=1) -> Tuple[Optional[str], List[str]]:
         if b"window.location.href = " in file_contents:
             # Document contains code that will cause a redirect, something we likely can't follow
-            return
+            return None, []
+
+        if self.browser is None:
+            # A previous relaunch failed partway through; try again before rendering
+            self._launch_browser()
+        try:
+            # Fast liveness probe on the persistent browser — only HTML renders pay for
+            # it, and only a crashed browser pays for the relaunch
+            self.browser.window_handles
+        except WebDriverException:
+            self.log.warning("Persistent browser is unresponsive, relaunching it")
+            try:
+                self.browser.quit()
+            except WebDriverException:
+                pass
+            self.browser = None
+            self._launch_browser()
 
         with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp_pdf:
             # Load base64'd HTML contents directly into new window of browser
@@ -148,11 +234,13 @@ class DocumentPreview(ServiceBase):
             try:
                 tmp_pdf.write(b64decode(self.browser.print_page(print_opt)))
                 tmp_pdf.flush()
-                return tmp_pdf.name
+                return tmp_pdf.name, []
             except WebDriverException:
                 # We aren't able to print the page to PDF, take a screenshot instead
-                self.browser.save_screenshot(os.path.join(self.working_directory, "output_screenshot.png"))
-                return
+                screenshot_path = os.path.join(self.working_directory, "output_screenshot.png")
+                if self.browser.save_screenshot(screenshot_path):
+                    return None, [screenshot_path]
+                return None, []
             finally:
                 # Reset browser for next run by closing all windows (except for the first one which we created)
 
@@ -166,18 +254,130 @@ class DocumentPreview(ServiceBase):
                     self.browser.close()
                     self.browser.switch_to.window(self.browser.window_handles[-1])
 
-    def pdf_to_images(self, file, max_pages=None):
-        convert_from_path(file, self.working_directory, first_page=1, last_page=max_pages)
+    def pdf_to_images(self, file, max_pages=None, dpi=None):
+        # Render pages in-process rather than forking out to pdftoppm for every document.
+        # Rendering happens on a background thread that hands page paths back through a
+        # queue, so the caller can OCR early pages while later ones are still rendering.
+        scale = (dpi or int(PDFTOPPM_DPI)) / 72
+        pdf = pdfium.PdfDocument(file)
+        self._pdf_page_count = page_count = len(pdf)
+        pages_to_render = min(page_count, max_pages) if max_pages else page_count
+
+        # Large documents are worth fanning out across worker processes in page batches;
+        # the parsed handle isn't shareable, so close it and let each worker open its own
+        page_batch_size = self.config.get("page_batch_size", 10)
+        if pages_to_render >= page_batch_size * 2:
+            pdf.close()
+            return self._pdf_to_images_batched(file, pages_to_render, page_batch_size, scale)
+
+        # Bounded so the renderer cannot run away holding page bitmaps in memory
+        queue = Queue(maxsize=4)
+        # Set when the consumer walks away from the generator, so the renderer
+        # doesn't block forever against the full queue and leak itself, the open
+        # document handle and the queued bitmaps
+        abandoned = Event()
+
+        def put(item):
+            while not abandoned.is_set():
+                try:
+                    queue.put(item, timeout=1)
+                    return True
+                except Full:
+                    continue
+            return False
+
+        def render():
+            try:
+                try:
+                    for i in range(pages_to_render):
+                        image = pdf[i].render(scale=scale).to_pil()
+                        output_path = os.path.join(self.working_directory, f"output_{i:03}.jpeg")
+                        image.save(output_path, "JPEG", quality=85)
+                        # Hand back the bitmap alongside the path so OCR can reuse it
+                        # without decoding the JPEG it was just encoded to
+                        if not put((output_path, image)):
+                            break
+                finally:
+                    pdf.close()
+            except Exception as e:
+                # Stop rendering but let the caller keep whatever pages completed
+                self.log.warning(f"PDF rendering stopped early: {e}")
+            finally:
+                put(None)
+
+        def pages():
+            # Started here rather than eagerly so a generator that is never pulled
+            # from never spawns (and strands) a renderer
+            Thread(target=render, daemon=True).start()
+            try:
+                while True:
+                    page = queue.get()
+                    if page is None:
+                        break
+                    yield page
+            finally:
+                abandoned.set()
+
+        return pages()
+
+    def _pdf_to_images_batched(self, file, pages_to_render, page_batch_size, scale):
+        # Split the page range into contiguous batches rendered by parallel worker
+        # processes, capped to the cores this service is allowed to schedule on.
+        # Batches are submitted in order and their pages yielded as they complete,
+        # so the caller can start on early pages while later batches still render.
+        batch_count = (pages_to_render + page_batch_size - 1) // page_batch_size
+        workers = min(len(os.sched_getaffinity(0)), batch_count)
+
+        def pages():
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    batches = [
+                        executor.submit(
+                            _render_page_batch,
+                            file,
+                            first_page,
+                            min(first_page + page_batch_size, pages_to_render),
+                            self.working_directory,
+                            scale,
+                        )
+                        for first_page in range(0, pages_to_render, page_batch_size)
+                    ]
+                    for batch in batches:
+                        for output_path in batch.result():
+                            yield output_path, None
+            except Exception as e:
+                # Stop rendering but let the caller keep whatever pages completed
+                self.log.warning(f"PDF rendering stopped early: {e}")
+
+        return pages()
+
+    def ocr_page(self, image, ocr_io=None):
+        # Same OCR pass as assemblyline_v4_service's ocr_detections, but accepts an
+        # in-memory bitmap so rendered pages skip the JPEG decode round-trip
+        if isinstance(image, str):
+            image = Image.open(image)
+        try:
+            ocr_output = pytesseract.image_to_string(image, timeout=15)  # Stop OCR after 15 seconds
+        except (TypeError, RuntimeError):
+            # Image given isn't supported therefore no OCR output can be given with tesseract
+            return {}
+
+        if ocr_io:
+            ocr_io.write(ocr_output)
+
+        return indicator_detections(ocr_output)
+
+    def render_documents(self, request: Request, max_pages=1) -> Tuple[Optional[str], List[str]]:
+        # Returns a PDF to be rendered into page images and/or the preview images
+        # that were produced directly, saving the caller a directory scan
+
+        handler = RENDER_HANDLERS.get(request.file_type)
 
-    def render_documents(self, request: Request, max_pages=1) -> str:
         # Word/Excel/Powerpoint/RTF/ODT
-        if request.file_type.startswith("document/odt") or any(
-            request.file_type == f"document/office/{ms_product}"
-            for ms_product in ["word", "excel", "powerpoint", "rtf"]
-        ):
-            return self.office_conversion(request.file_path)
+        if handler == "office":
+            return self.office_conversion(request.file_path), []
         # CSV
-        elif request.file_type == "text/csv":
+        elif handler == "csv":
             with tempfile.NamedTemporaryFile(dir=self.working_directory) as tmp:
                 with pandas.ExcelWriter(tmp) as writer:
                     # Convert CSV to Excel spreadsheet, then render
@@ -200,27 +400,36 @@ class DocumentPreview(ServiceBase):
                         )  # adding a little extra space
                         worksheet.set_column(idx, idx, max_len)  # set column width
 
-                return self.office_conversion(tmp.name)
+                return self.office_conversion(tmp.name), []
 
         # PDF
-        elif request.file_type == "document/pdf":
-            return request.file_path
-        elif request.file_type in ["document/epub", "document/mobi"]:
-            return self.ebook_conversion(request)
+        elif handler == "pdf":
+            return request.file_path, []
+        elif handler == "ebook":
+            return self.ebook_conversion(request), []
         # EML/MSG
-        elif request.file_type.endswith("email"):
+        elif handler == "email":
             file_contents = request.file_contents
             # Peek at the first 15 bytes of the content
             file_contents_peek = file_contents[:15].lower()
-            # Convert MSG to EML where applicable
+            # Convert MSG to EML where applicable, receiving the EML straight off the
+            # pipe rather than round-tripping it through a temporary file. msgconvert
+            # opens its outfile as a plain path ("-" would be a literal filename), so
+            # hand it /dev/stdout to reach the captured pipe.
             if request.file_type == "document/office/email":
-                with tempfile.NamedTemporaryFile(suffix=".eml") as tmp:
-                    subprocess.run(
-                        ["msgconvert", "-outfile", tmp.name, request.file_path],
+                try:
+                    file_contents = subprocess.run(
+                        ["msgconvert", "-outfile", "/dev/stdout", request.file_path],
                         capture_output=True,
-                    )
-                    tmp.seek(0)
-                    file_contents = tmp.read()
+                        timeout=self.conversion_timeout,
+                        check=True,
+                    ).stdout
+                except subprocess.TimeoutExpired:
+                    self.log.warning(f"msgconvert timed out after {self.conversion_timeout}s")
+                    return None, []
+                except subprocess.CalledProcessError as e:
+                    self.log.warning(f"msgconvert failed: {e.stderr}")
+                    return None, []
             elif request.file_type == "document/email" and (
                 file_contents_peek.startswith(b"<html") or file_contents_peek == b"<!doctype html>"
             ):
@@ -228,17 +437,21 @@ class DocumentPreview(ServiceBase):
                 return self.html_render(request.file_contents, max_pages)
             # Render EML as PNG
             # If we have internet access, we'll attempt to load external images
-            eml2image(
+            eml_image = eml2image(
                 file_contents,
                 self.working_directory,
                 self.log,
                 load_ext_images=False,
                 load_images=request.get_param("load_email_images"),
+                config=self._eml_render_config,
             )
+            return None, [eml_image] if eml_image else []
         # HTML
-        elif request.file_type == "code/html":
+        elif handler == "html":
             return self.html_render(request.file_contents, max_pages)
 
+        return None, []
+
     def tag_network_iocs(self, section: ResultSection, ocr_content: str) -> None:
         [section.add_tag("network.email.address", node.value) for node in find_emails(ocr_content.encode())]
         [section.add_tag("network.static.uri", node.value) for node in find_urls(ocr_content.encode())]
@@ -250,11 +463,22 @@ class DocumentPreview(ServiceBase):
         # Attempt to render documents given and dump them to the working directory
         max_pages = int(request.get_param("max_pages_rendered"))
         save_ocr_output = request.get_param("save_ocr_output").lower()
+        run_ocr_on_first_n_pages = request.get_param("run_ocr_on_first_n_pages")
+        previews = []
+        self._pdf_page_count = None
         try:
-            pdf_path = self.render_documents(request, max_pages)
+            pdf_path, rendered = self.render_documents(request, max_pages)
             if pdf_path:
-                # Convert PDF to images for ImageSection
-                self.pdf_to_images(pdf_path, max_pages)
+                # Convert PDF to images for ImageSection, streamed as each page lands on
+                # disk so downstream OCR overlaps with rendering of the remaining pages.
+                # Gallery-only renders don't need full OCR resolution.
+                dpi = int(PDFTOPPM_DPI) if run_ocr_on_first_n_pages or request.deep_scan else 100
+                pages = self.pdf_to_images(pdf_path, max_pages, dpi=dpi)
+                first_page = next(pages, None)
+                if first_page:
+                    previews = chain([first_page], pages)
+            else:
+                previews = [(path, None) for path in rendered]
         except Exception as e:
             # Unable to complete analysis after unexpected error, give up
             self.log.error(e)
@@ -262,41 +486,81 @@ class DocumentPreview(ServiceBase):
             return
         # Create an image gallery section to show the renderings
         image_section = ResultImageSection(request, "Preview Image(s)")
-        run_ocr_on_first_n_pages = request.get_param("run_ocr_on_first_n_pages")
-        previews = [s for s in os.listdir(self.working_directory) if "output" in s]
 
         if not previews:
             # No previews found, unable to proceed
             request.result = result
             return
 
+        def attach_ocr_detections(detections, img_name) -> None:
+            # Mirrors what add_image does with an ocr_heuristic_id, but on OCR output
+            # that was computed from the rendered bitmap rather than the saved image
+            if detections.get("password"):
+                # If we were able to detect potential passwords, add it to the submission's password list
+                pw_list = set(request.temp_submission_data.get("passwords", []))
+                [pw_list.update(extract_passwords(pw_string)) for pw_string in detections["password"]]
+                request.temp_submission_data["passwords"] = sorted(pw_list)
+
+            heuristic = Heuristic(1, signatures={f"{k}_strings": len(v) for k, v in detections.items()})
+            ocr_section = ResultKeyValueSection(f"Suspicious strings found during OCR analysis on file {img_name}")
+            ocr_section.set_heuristic(heuristic)
+            for k, v in detections.items():
+                ocr_section.set_item(k, v)
+            image_section.add_subsection(ocr_section)
+
         def attach_images_to_section(run_ocr=False) -> str:
             extracted_text = ""
-            for i, preview in enumerate(natsorted(previews)):
-                ocr_heur_id, ocr_io = None, None
-                if run_ocr:
-                    # Trigger OCR on the first N pages as specified in the submission
-                    ocr_heur_id = 1 if request.deep_scan or (i < run_ocr_on_first_n_pages) else None
-                    ocr_io = StringIO()
-
-                img_name = f"page_{str(i).zfill(3)}.png"
-                fp = os.path.join(self.working_directory, preview)
-                image_section.add_image(
-                    fp,
-                    name=img_name,
-                    description=f"Here's the preview for page {i}",
-                    ocr_heuristic_id=ocr_heur_id,
-                    ocr_io=ocr_io,
-                )
+            ocr_outputs = []
+            ocr_tasks = []
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                for i, (preview, page_image) in enumerate(previews):
+                    ocr_heur_id, ocr_io = None, None
+                    if run_ocr:
+                        # Trigger OCR on the first N pages as specified in the submission
+                        ocr_heur_id = 1 if request.deep_scan or (i < run_ocr_on_first_n_pages) else None
+                        ocr_io = StringIO()
+                        ocr_outputs.append(ocr_io)
+
+                    img_name = f"page_{str(i).zfill(3)}.png"
+                    if ocr_heur_id:
+                        # Fan pages out to the pool: every page OCRs in its own tesseract
+                        # process, so threads are enough to use all cores while later
+                        # pages are still rendering. OCR the in-memory bitmap when the
+                        # renderer handed one over, the on-disk preview otherwise.
+                        ocr_tasks.append(
+                            (
+                                img_name,
+                                executor.submit(
+                                    self.ocr_page,
+                                    page_image if page_image is not None else preview,
+                                    ocr_io,
+                                ),
+                            )
+                        )
 
-                if request.get_param("analyze_render"):
-                    request.add_extracted(
-                        fp,
+                    image_section.add_image(
+                        preview,
                         name=img_name,
                         description=f"Here's the preview for page {i}",
                     )
-                if run_ocr:
-                    extracted_text += f"{ocr_io.read()}\n\n"
+
+                    if request.get_param("analyze_render"):
+                        request.add_extracted(
+                            preview,
+                            name=img_name,
+                            description=f"Here's the preview for page {i}",
+                        )
+
+                # Attach OCR findings in page order once the pool drains
+                for img_name, task in ocr_tasks:
+                    detections = task.result()
+                    if detections:
+                        attach_ocr_detections(detections, img_name)
+
+            for ocr_io in ocr_outputs:
+                # getvalue() rather than read(): the buffer's cursor sits at the end
+                # after OCR wrote to it, so read() would always come back empty
+                extracted_text += f"{ocr_io.getvalue()}\n\n"
             return extracted_text
 
         if not run_ocr_on_first_n_pages:
@@ -309,19 +573,22 @@ class DocumentPreview(ServiceBase):
             extracted_text = ""
             if extracted_text_path is not None:
                 extracted_text = open(extracted_text_path, "r").read()
-                # Add all images to section
-                attach_images_to_section()
+                with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                    # Pull embedded images out of the PDF while the page previews are
+                    # being attached instead of waiting for one stage after the other
+                    embedded_images = executor.submit(self.extract_pdf_images, pdf_path, max_pages)
 
-                # We were able to extract content, perform term detection
-                detections = indicator_detections(extracted_text)
+                    # Add all images to section
+                    attach_images_to_section()
 
-                # Try to extract any images from the page range and run them through OCR
-                for image_path in self.extract_pdf_images(pdf_path, max_pages):
-                    d = ocr_detections(image_path)
+                    # We were able to extract content, perform term detection
+                    detections = indicator_detections(extracted_text)
 
-                    # Merge indicator detections
-                    for k in set(list(d.keys()) + list(detections.keys())):
-                        detections[k] = list(set(detections.get(k, []) + d.get(k, [])))
+                    # Try to extract any images from the page range and run them through OCR
+                    for d in executor.map(ocr_detections, embedded_images.result()):
+                        # Merge indicator detections
+                        for k in set(list(d.keys()) + list(detections.keys())):
+                            detections[k] = list(set(detections.get(k, []) + d.get(k, [])))
 
                 if detections:
                     # If we were able to detect potential passwords, add it to the submission's password list
@@ -349,7 +616,11 @@ class DocumentPreview(ServiceBase):
             if save_ocr_output == "no":
                 pass
             else:
-                with tempfile.NamedTemporaryFile("w", delete=False, suffix=".txt") as extracted_text_fh:
+                # Keep the dump in the working directory so the framework cleans it up;
+                # a file in /tmp with delete=False would be leaked on every request
+                with tempfile.NamedTemporaryFile(
+                    "w", dir=self.working_directory, delete=False, suffix=".txt"
+                ) as extracted_text_fh:
                     extracted_text_fh.write(extracted_text)
                     extracted_text_fh.flush()
 
@@ -364,18 +635,14 @@ class DocumentPreview(ServiceBase):
 
             # Check to see if we're dealing with a suspicious PDF
             if request.file_type == "document/pdf":
-                try:
-                    if pdfinfo_from_path(request.file_path)["Pages"] == 1 and "click" in extracted_text.lower():
-                        # Suspected document is part of a phishing campaign
-                        ResultTextSection(
-                            "Suspected Phishing",
-                            body='Single-paged document containing the term "click"',
-                            heuristic=Heuristic(2),
-                            parent=result,
-                        )
-                except Exception:
-                    # There was a problem fetching the page count from the PDF, move on..
-                    pass
+                if self._pdf_page_count == 1 and "click" in extracted_text.lower():
+                    # Suspected document is part of a phishing campaign
+                    ResultTextSection(
+                        "Suspected Phishing",
+                        body='Single-paged document containing the term "click"',
+                        heuristic=Heuristic(2),
+                        parent=result,
+                    )
         image_section.promote_as_screenshot()
         result.add_section(image_section)
         request.result = result
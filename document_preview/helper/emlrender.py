@@ -61,7 +61,19 @@ def appendImages(images):
     return new_im
 
 
-def processEml(data, output_dir, logger, load_ext_images=False, load_images=False):
+def renderConfig(load_ext_images=False):
+    """
+    Build the reusable imgkit rendering configuration: the wkhtmltoimage binary
+    lookup and the option set. Callers can build this once and reuse it for
+    every mail instead of re-resolving it per render.
+    """
+    imgkitOptions = {"load-error-handling": "skip", "quiet": None}
+    if not load_ext_images:
+        imgkitOptions.update({"no-images": None, "disable-javascript": None})
+    return imgkit.config(), imgkitOptions
+
+
+def processEml(data, output_dir, logger, load_ext_images=False, load_images=False, config=None):
     """
     Process the email (bytes), extract MIME parts and useful headers.
     Generate a PNG picture of the mail
@@ -106,10 +118,9 @@ def processEml(data, output_dir, logger, load_ext_images=False, load_images=Fals
     logger.info("Message-Id: %s" % idField)
     idField = idField.replace("<", "&lt;").replace(">", "&gt;")
 
-    imgkitOptions = {"load-error-handling": "skip", "quiet": None}
-    if not load_ext_images:
-        imgkitOptions.update({"no-images": None, "disable-javascript": None})
-    # imgkitOptions.update({ 'quiet': None })
+    if config is None:
+        config = renderConfig(load_ext_images)
+    imgkitConfig, imgkitOptions = config
     imagesList = []
 
     # Build a first image with basic mail details
@@ -131,7 +142,7 @@ def processEml(data, output_dir, logger, load_ext_images=False, load_images=Fals
     )
     try:
         header_path = NamedTemporaryFile(suffix=".png").name
-        imgkit.from_string(headers, header_path, options=imgkitOptions)
+        imgkit.from_string(headers, header_path, options=imgkitOptions, config=imgkitConfig)
         logger.info("Created headers %s" % header_path)
         imagesList.append(header_path)
     except Exception as e:
@@ -165,7 +176,7 @@ def processEml(data, output_dir, logger, load_ext_images=False, load_images=Fals
 
             try:
                 payload_path = NamedTemporaryFile(suffix=".png").name
-                imgkit.from_string(payload, payload_path, options=imgkitOptions)
+                imgkit.from_string(payload, payload_path, options=imgkitOptions, config=imgkitConfig)
                 logger.info("Decoded %s" % payload_path)
                 imagesList.append(payload_path)
             except Exception as e: